@@ -12,46 +12,79 @@ Datasets disponibles:
 El usuario puede elegir qué combinación de datasets mostrar en el mapa,
 la paleta de colores (desde datos/paletas.json), y el área geográfica.
 
-Dependencias: geopandas, matplotlib
+Dependencias: geopandas, pyogrio, pyarrow, matplotlib, numpy
 """
 
 import os
+import gc
 import json
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import numpy as np
+import shapely
 import geopandas as gpd
+import matplotlib
+
+# Sin pantalla (servidor/CI en Linux) se fija Agg antes de importar pyplot:
+# evita sondear backends interactivos y plt.show() se omite más abajo
+SIN_PANTALLA = (
+    sys.platform.startswith("linux")
+    and not os.environ.get("DISPLAY")
+    and not os.environ.get("WAYLAND_DISPLAY")
+)
+if SIN_PANTALLA and not os.environ.get("MPLBACKEND"):
+    matplotlib.use("Agg")
+
 import matplotlib.pyplot as plt
 import matplotlib.patheffects as pe
-from shapely.ops import unary_union
+from matplotlib.collections import LineCollection
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
+from matplotlib.transforms import offset_copy
 from shapely.geometry import box
 
+try:
+    import orjson  # opcional: decodifica JSON varias veces más rápido
+except ImportError:
+    orjson = None
+
 # ─── Configuración ────────────────────────────────────────────────────────────
 DATOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos")
 ARCHIVO_PALETAS = os.path.join(DATOS_DIR, "paletas.json")
 
 # Definición de los 4 datasets de Natural Earth
+# "columnas": atributos que se leen del shapefile (el resto nunca se decodifica)
 DATASETS = {
     "estados": {
         "nombre": "Estados/Provincias (contornos)",
         "archivo": "ne_10m_admin_1_states_provinces.zip",
         "url": "https://naciscdn.org/naturalearth/10m/cultural/ne_10m_admin_1_states_provinces.zip",
         "tipo": "poligono",
+        "columnas": ["admin", "name"],
     },
     "ciudades": {
         "nombre": "Ciudades/Localidades (puntos)",
         "archivo": "ne_10m_populated_places.zip",
         "url": "https://naciscdn.org/naturalearth/10m/cultural/ne_10m_populated_places.zip",
         "tipo": "punto",
+        "columnas": ["NAME", "name", "POP_MAX", "POP_MIN", "pop_max", "pop_min",
+                     "SOV0NAME", "ADM0NAME"],
     },
     "paises": {
         "nombre": "Países (fronteras)",
         "archivo": "ne_10m_admin_0_countries.zip",
         "url": "https://naciscdn.org/naturalearth/10m/cultural/ne_10m_admin_0_countries.zip",
         "tipo": "poligono",
+        "columnas": ["ADMIN", "NAME"],
     },
     "carreteras": {
         "nombre": "Carreteras principales",
         "archivo": "ne_10m_roads.zip",
         "url": "https://naciscdn.org/naturalearth/10m/cultural/ne_10m_roads.zip",
         "tipo": "linea",
+        "columnas": [],
     },
 }
 
@@ -61,6 +94,9 @@ LAT_MAX_DEFAULT = 33.0
 LON_MIN_DEFAULT = -120.0
 LON_MAX_DEFAULT = -108.0
 
+# Resolución de la imagen exportada
+DPI_SALIDA = 200
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 #  FUNCIONES DE DESCARGA
@@ -80,15 +116,22 @@ def descargar_dataset(clave):
     print(f"  ⬇️  Descargando {ds['nombre']}...")
     print(f"      URL: {ds['url']}")
 
+    # Se escribe a un .part en bloques de 1 MiB y solo se renombra al
+    # terminar: un archivo a medias nunca queda con el nombre final
+    ruta_parcial = ruta + ".part"
     try:
+        import shutil
         import urllib.request
-        urllib.request.urlretrieve(ds["url"], ruta)
+        with urllib.request.urlopen(ds["url"], timeout=60) as resp, \
+                open(ruta_parcial, "wb") as f:
+            shutil.copyfileobj(resp, f, 1 << 20)
+        os.replace(ruta_parcial, ruta)
         tamaño = os.path.getsize(ruta) / (1024 * 1024)
         print(f"  ✅ Descarga completada ({tamaño:.1f} MB)")
     except Exception as e:
         print(f"  ❌ Error al descargar {ds['nombre']}: {e}")
-        if os.path.exists(ruta):
-            os.remove(ruta)
+        if os.path.exists(ruta_parcial):
+            os.remove(ruta_parcial)
         return None
 
     return ruta
@@ -102,9 +145,13 @@ def descargar_datasets_seleccionados(seleccion):
     print(f"  Fuente: Natural Earth (naturalearthdata.com)")
     print("")
 
+    # Las descargas son I/O de red: se lanzan en paralelo
+    with ThreadPoolExecutor(max_workers=len(seleccion)) as ex:
+        resultados = dict(zip(seleccion, ex.map(descargar_dataset, seleccion)))
+
     rutas = {}
     for clave in seleccion:
-        ruta = descargar_dataset(clave)
+        ruta = resultados[clave]
         if ruta:
             rutas[clave] = ruta
         else:
@@ -163,15 +210,27 @@ def pedir_datasets():
     return seleccion
 
 
+def _leer_json(ruta):
+    """Lee un archivo JSON con orjson si está instalado, o con json si no."""
+    if orjson is not None:
+        with open(ruta, "rb") as f:
+            return orjson.loads(f.read())
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=1)
 def cargar_paletas():
-    """Carga las paletas de colores desde el archivo JSON."""
+    """
+    Carga las paletas de colores desde el archivo JSON. El resultado se
+    memoriza: llamadas posteriores no vuelven a leer el archivo.
+    """
     if not os.path.exists(ARCHIVO_PALETAS):
         print(f"  ⚠️  No se encontró: {ARCHIVO_PALETAS}")
         return [paleta_por_defecto()]
 
     try:
-        with open(ARCHIVO_PALETAS, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _leer_json(ARCHIVO_PALETAS)
         paletas = data.get("paletas", [])
         if not paletas:
             return [paleta_por_defecto()]
@@ -264,10 +323,83 @@ def pedir_coordenadas():
 #  FUNCIONES DE CARGA DE DATOS
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def _ruta_cache(clave, bbox):
+    """Ruta del GeoParquet con la capa ya filtrada, una por (dataset, área)."""
+    huella = hashlib.md5(repr((clave, bbox)).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(DATOS_DIR, f"{clave}_{huella}.parquet")
+
+
+def _leer_cache(clave, ruta, bbox):
+    """Devuelve la capa cacheada, o None si no existe o es más vieja que el ZIP."""
+    cache = _ruta_cache(clave, bbox)
+    if not os.path.exists(cache) or os.path.getmtime(cache) < os.path.getmtime(ruta):
+        return None
+    try:
+        capa = gpd.read_parquet(cache)
+    except Exception as e:
+        print(f"    ⚠️  Caché ilegible ({e}), se lee el shapefile.")
+        return None
+    print(f"    ⚡ Desde caché: {os.path.basename(cache)} ({len(capa)} registros)")
+    return capa
+
+
+def _reducir_precision(capa):
+    """
+    Redondea las coordenadas a una rejilla de 1e-5° (~1 m). Natural Earth
+    guarda doble precisión completa, pero a 200 DPI no se distingue nada por
+    debajo de ~1e-4°; la capa ocupa menos y el GeoParquet comprime mejor.
+    Antes se reparan las geometrías inválidas (p. ej. polígonos que se
+    autointersectan): set_precision y el recorte posterior fallan con ellas.
+    """
+    capa = capa.copy()
+    geometrias = shapely.make_valid(capa.geometry.values)
+    capa["geometry"] = shapely.set_precision(geometrias, 1e-5)
+    return capa[~shapely.is_empty(capa.geometry.values)]
+
+
+def _guardar_cache(capa, clave, bbox):
+    """
+    Guarda la capa filtrada como GeoParquet para las siguientes ejecuciones.
+    Se escribe en un .part y se renombra al terminar: una ejecución
+    interrumpida nunca deja una caché truncada con el nombre final.
+    """
+    ruta = _ruta_cache(clave, bbox)
+    ruta_parcial = ruta + ".part"
+    try:
+        capa.to_parquet(ruta_parcial, compression="zstd")
+        os.replace(ruta_parcial, ruta)
+    except Exception as e:
+        print(f"    ⚠️  No se pudo guardar la caché: {e}")
+    finally:
+        if os.path.exists(ruta_parcial):
+            os.remove(ruta_parcial)
+
+
+def leer_capa(clave, ruta, bbox=None, where=None):
+    """
+    Lee un shapefile del ZIP con pyogrio, filtrando dentro de GDAL.
+    bbox=(lon_min, lat_min, lon_max, lat_max) descarta las geometrías cuyo
+    envolvente queda fuera del área y where aplica un filtro de atributos,
+    así nunca se materializan los features del resto del mundo.
+    """
+    return gpd.read_file(
+        f"/vsizip/{ruta}",
+        engine="pyogrio",
+        bbox=bbox,
+        where=where,
+        columns=DATASETS[clave]["columnas"],
+    )
+
+
 def cargar_estados(ruta, lat_min, lat_max, lon_min, lon_max):
     """Carga y filtra los estados de Baja California."""
     print("  Cargando estados...")
-    gdf = gpd.read_file(f"zip://{ruta}")
+    baja = _leer_cache("estados", ruta, None)
+    if baja is not None:
+        return baja
+
+    # Sin bbox: los estados son la capa base y se cargan siempre completos
+    gdf = leer_capa("estados", ruta, where="admin = 'Mexico'")
 
     estados_peninsula = ["Baja California", "Baja California Sur"]
     baja = gdf[
@@ -282,17 +414,27 @@ def cargar_estados(ruta, lat_min, lat_max, lon_min, lon_max):
         ].copy()
 
     print(f"    Estados: {list(baja['name'].values)}")
+    baja = _reducir_precision(baja)
+    _guardar_cache(baja, "estados", None)
     return baja
 
 
 def cargar_ciudades(ruta, lat_min, lat_max, lon_min, lon_max):
     """Carga ciudades dentro del área seleccionada."""
     print("  Cargando ciudades...")
-    gdf = gpd.read_file(f"zip://{ruta}")
+    bbox = (lon_min, lat_min, lon_max, lat_max)
+    ciudades = _leer_cache("ciudades", ruta, bbox)
+    if ciudades is not None:
+        return ciudades
 
-    # Filtrar por el bounding box del área
-    area = box(lon_min, lat_min, lon_max, lat_max)
-    ciudades = gdf[gdf.geometry.within(area)].copy()
+    gdf = leer_capa("ciudades", ruta, bbox=bbox)
+
+    # Filtrar por el bounding box del área: para puntos contra un rectángulo
+    # basta comparar las coordenadas directamente en NumPy
+    xs = gdf.geometry.x.values
+    ys = gdf.geometry.y.values
+    dentro = (xs >= lon_min) & (xs <= lon_max) & (ys >= lat_min) & (ys <= lat_max)
+    ciudades = gdf[dentro].copy()
 
     # Intentar filtrar solo México si hay columna adecuada
     if "SOV0NAME" in ciudades.columns:
@@ -309,13 +451,20 @@ def cargar_ciudades(ruta, lat_min, lat_max, lon_min, lon_max):
         nombres = sorted(ciudades["NAME"].tolist())
         print(f"    Nombres: {', '.join(nombres[:15])}" +
               (f" ... (+{len(nombres)-15} más)" if len(nombres) > 15 else ""))
+    ciudades = _reducir_precision(ciudades)
+    _guardar_cache(ciudades, "ciudades", bbox)
     return ciudades
 
 
 def cargar_paises(ruta, lat_min, lat_max, lon_min, lon_max):
     """Carga fronteras de países que intersectan con el área."""
     print("  Cargando países...")
-    gdf = gpd.read_file(f"zip://{ruta}")
+    bbox = (lon_min, lat_min, lon_max, lat_max)
+    paises = _leer_cache("paises", ruta, bbox)
+    if paises is not None:
+        return paises
+
+    gdf = leer_capa("paises", ruta, bbox=bbox)
 
     # Filtrar México y Estados Unidos (vecinos de la península)
     paises_interes = ["Mexico", "United States of America"]
@@ -325,32 +474,131 @@ def cargar_paises(ruta, lat_min, lat_max, lon_min, lon_max):
         paises = gdf[gdf["NAME"].isin(paises_interes)].copy()
     else:
         # Filtrar por bounding box
-        area = box(lon_min, lat_min, lon_max, lat_max)
-        paises = gdf[gdf.geometry.intersects(area)].copy()
+        area = box(*bbox)
+        paises = gdf.iloc[np.sort(gdf.sindex.query(area, predicate="intersects"))].copy()
 
     print(f"    Países cargados: {len(paises)}")
+    paises = _reducir_precision(paises)
+    _guardar_cache(paises, "paises", bbox)
     return paises
 
 
 def cargar_carreteras(ruta, lat_min, lat_max, lon_min, lon_max):
     """Carga carreteras dentro del área seleccionada."""
     print("  Cargando carreteras...")
-    gdf = gpd.read_file(f"zip://{ruta}")
+    bbox = (lon_min, lat_min, lon_max, lat_max)
+    carreteras = _leer_cache("carreteras", ruta, bbox)
+    if carreteras is not None:
+        return carreteras
+
+    gdf = leer_capa("carreteras", ruta, bbox=bbox)
 
-    # Filtrar por bounding box
-    area = box(lon_min, lat_min, lon_max, lat_max)
-    carreteras = gdf[gdf.geometry.intersects(area)].copy()
+    # Filtrar por bounding box (el R-tree poda por envolvente)
+    area = box(*bbox)
+    carreteras = gdf.iloc[np.sort(gdf.sindex.query(area, predicate="intersects"))].copy()
 
     print(f"    Segmentos de carretera: {len(carreteras)}")
+    carreteras = _reducir_precision(carreteras)
+    _guardar_cache(carreteras, "carreteras", bbox)
     return carreteras
 
 
+# Función de carga de cada dataset
+CARGADORES = {
+    "estados": cargar_estados,
+    "ciudades": cargar_ciudades,
+    "paises": cargar_paises,
+    "carreteras": cargar_carreteras,
+}
+
+
+# Capas que generar_mapa recorta con _recortar (las únicas que usan el R-tree)
+CAPAS_RECORTADAS = ("paises", "carreteras")
+
+
+def cargar_datasets(rutas, lat_min, lat_max, lon_min, lon_max):
+    """
+    Carga en paralelo todos los datasets descargados. La lectura la hace
+    GDAL en C (pyogrio libera el GIL), así que los hilos se solapan.
+    """
+    def cargar(clave, ruta):
+        capa = CARGADORES[clave](ruta, lat_min, lat_max, lon_min, lon_max)
+        if clave in CAPAS_RECORTADAS:
+            # Construir el R-tree aquí, dentro del hilo de carga, para que
+            # el recorte de generar_mapa (_recortar) lo encuentre ya listo
+            capa.sindex
+        return capa
+
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        futuros = {
+            clave: ex.submit(cargar, clave, ruta)
+            for clave, ruta in rutas.items()
+        }
+        return {clave: f.result() for clave, f in futuros.items()}
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 #  GENERACIÓN DEL MAPA
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def _recortar(capa, caja):
+    """
+    Copia de la capa recortada a la caja visible, sin las filas que quedan
+    vacías. Así el renderizador no procesa vértices que igual caerían fuera
+    de los límites de los ejes. Solo se intersectan las geometrías que
+    cruzan el borde; las que caben completas se detectan con el R-tree.
+    """
+    dentro = capa.sindex.query(caja, predicate="contains")
+    cruzan = np.ones(len(capa), dtype=bool)
+    cruzan[dentro] = False
+
+    geometrias = np.asarray(capa.geometry.values).copy()
+    geometrias[cruzan] = shapely.intersection(geometrias[cruzan], caja)
+
+    capa = capa.copy()
+    capa["geometry"] = geometrias
+    return capa[~shapely.is_empty(geometrias)]
+
+
+def _coleccion_lineas(geometrias, **estilo):
+    """
+    Convierte un arreglo de geometrías lineales en una sola LineCollection,
+    en lugar de un artista por geometría como hace GeoDataFrame.plot.
+    """
+    partes = shapely.get_parts(geometrias)
+    partes = partes[shapely.get_type_id(partes) == shapely.GeometryType.LINESTRING]
+    if len(partes) == 0:
+        return LineCollection([], **estilo)
+    _, coords, (offsets,) = shapely.to_ragged_array(partes)
+    return LineCollection(np.split(coords, offsets[1:-1]), **estilo)
+
+
+def _trayectoria_anillos(geometria):
+    """Path compuesto con todos los anillos de un (Multi)Polygon."""
+    anillos = shapely.get_rings(shapely.get_parts(geometria))
+    return Path.make_compound_path(
+        *[Path(shapely.get_coordinates(a)) for a in anillos]
+    )
+
+
+def _simplificar(capa, tolerancia):
+    """
+    Copia de la capa con las geometrías simplificadas a la tolerancia dada
+    (en grados). Los vértices más finos que un píxel no se ven en la
+    imagen final y solo encarecen el dibujo.
+    """
+    capa = capa.copy()
+    capa["geometry"] = shapely.simplify(
+        capa.geometry.values, tolerancia, preserve_topology=True
+    )
+    return capa
+
+
 def generar_mapa(datos, lat_min, lat_max, lon_min, lon_max, paleta, seleccion):
-    """Genera el mapa con todos los datasets seleccionados."""
+    """
+    Genera el mapa con todos los datasets seleccionados. Las capas se sacan
+    de `datos` conforme se dibujan, así se liberan antes de guardar.
+    """
 
     c = paleta  # alias corto
 
@@ -361,28 +609,53 @@ def generar_mapa(datos, lat_min, lat_max, lon_min, lon_max, paleta, seleccion):
     fig_ancho = 10
     fig_alto = max(6, fig_ancho * ratio)
 
+    # Tolerancia de simplificación: el ancho en grados de ~1 píxel de la
+    # imagen exportada (algo menos de un píxel de los ejes, que son más
+    # angostos que la figura)
+    tolerancia = ancho / (fig_ancho * DPI_SALIDA)
+    # Caja de recorte un 2% más amplia que la vista: los bordes que crea el
+    # corte quedan fuera de los ejes y no se dibujan como fronteras sobre
+    # el marco (_recortar usa la misma caja para su atajo "contains")
+    margen = 0.02 * max(ancho, alto)
+    caja = shapely.box(lon_min - margen, lat_min - margen, lon_max + margen, lat_max + margen)
+
     fig, ax = plt.subplots(
         1, 1,
         figsize=(fig_ancho, fig_alto),
-        facecolor=c.get("fondo_figura", "#ffffff")
+        facecolor=c.get("fondo_figura", "#ffffff"),
+        layout="constrained"
     )
     ax.set_facecolor(c.get("fondo_mapa", "#ffffff"))
 
     # ─── CAPA 1: Países (fondo, si está seleccionado) ─────────────────────
-    if "paises" in datos and datos["paises"] is not None:
-        paises = datos["paises"]
-        # Dibujar como fondo suave
+    paises = datos.pop("paises", None)
+    if paises is not None:
+        paises = _simplificar(_recortar(paises, caja), tolerancia)
+        # Dibujar como fondo suave: relleno + fronteras en una LineCollection.
+        # Las capas densas van rasterizadas (etiquetas y estados siguen vectoriales)
         paises.plot(
             ax=ax,
             color=c.get("relleno_tierra", "#f5e6ca"),
-            edgecolor=c.get("contorno", "#1a3c6e"),
-            linewidth=0.5,
-            alpha=0.3
+            edgecolor="none",
+            alpha=0.3,
+            rasterized=True
         )
+        ax.add_collection(_coleccion_lineas(
+            shapely.boundary(paises.geometry.values),
+            colors=c.get("contorno", "#1a3c6e"),
+            linewidths=0.5,
+            alpha=0.3,
+            rasterized=True
+        ))
+        del paises
 
     # ─── CAPA 2: Estados (siempre presente) ───────────────────────────────
-    baja = datos["estados"]
-    peninsula_unida = unary_union(baja.geometry)
+    estados = datos.pop("estados")
+    peninsula_unida = shapely.unary_union(estados.geometry.values)
+    peninsula_unida = shapely.simplify(
+        peninsula_unida, tolerancia, preserve_topology=True
+    )
+    baja = _simplificar(estados, tolerancia)
 
     # Relleno
     baja.plot(
@@ -392,14 +665,14 @@ def generar_mapa(datos, lat_min, lat_max, lon_min, lon_max, paleta, seleccion):
         alpha=0.8
     )
 
-    # Contorno unificado
-    gpd.GeoSeries([peninsula_unida]).plot(
-        ax=ax,
+    # Contorno unificado (un solo PathPatch, sin pasar por GeoPandas)
+    ax.add_patch(PathPatch(
+        _trayectoria_anillos(peninsula_unida),
         facecolor="none",
         edgecolor=c.get("contorno", "#1a3c6e"),
         linewidth=1.5,
         alpha=0.9
-    )
+    ))
 
     # División entre estados
     baja.boundary.plot(
@@ -410,39 +683,42 @@ def generar_mapa(datos, lat_min, lat_max, lon_min, lon_max, paleta, seleccion):
         alpha=0.6
     )
 
-    # Etiquetas de estados
-    for idx, row in baja.iterrows():
-        centroid = row.geometry.centroid
-        ax.annotate(
-            row["name"],
-            xy=(centroid.x, centroid.y),
+    # Etiquetas de estados (centroides calculados en bloque)
+    # (en grados: basta para colocar texto y evita el aviso de CRS geográfico)
+    centroides = shapely.centroid(baja.geometry.values)
+    contorno_texto = [
+        pe.withStroke(linewidth=3, foreground=c.get("texto_stroke", "#ffffff"))
+    ]
+    xs, ys = shapely.get_x(centroides), shapely.get_y(centroides)
+    for x, y, nombre in zip(xs, ys, baja["name"].values):
+        ax.text(
+            x, y, nombre,
             fontsize=11,
             fontweight="bold",
             color=c.get("texto_etiquetas", "#1a1a1a"),
             ha="center",
             va="center",
-            path_effects=[
-                pe.withStroke(
-                    linewidth=3,
-                    foreground=c.get("texto_stroke", "#ffffff")
-                )
-            ]
+            path_effects=contorno_texto
         )
+    del estados, baja, peninsula_unida, centroides
 
     # ─── CAPA 3: Carreteras (si está seleccionado) ────────────────────────
-    if "carreteras" in datos and datos["carreteras"] is not None:
-        carreteras = datos["carreteras"]
+    carreteras = datos.pop("carreteras", None)
+    if carreteras is not None:
+        carreteras = _simplificar(_recortar(carreteras, caja), tolerancia)
         if not carreteras.empty:
-            carreteras.plot(
-                ax=ax,
-                color=c.get("division_estados", "#cc3333"),
-                linewidth=0.8,
-                alpha=0.5
-            )
+            ax.add_collection(_coleccion_lineas(
+                carreteras.geometry.values,
+                colors=c.get("division_estados", "#cc3333"),
+                linewidths=0.8,
+                alpha=0.5,
+                rasterized=True
+            ))
+        del carreteras
 
     # ─── CAPA 4: Ciudades (si está seleccionado) ──────────────────────────
-    if "ciudades" in datos and datos["ciudades"] is not None:
-        ciudades = datos["ciudades"]
+    ciudades = datos.pop("ciudades", None)
+    if ciudades is not None:
         if not ciudades.empty:
             # Determinar columna de nombre
             col_nombre = "NAME" if "NAME" in ciudades.columns else "name"
@@ -452,51 +728,48 @@ def generar_mapa(datos, lat_min, lat_max, lon_min, lon_max, paleta, seleccion):
                     col_pop = candidato
                     break
 
-            # Dibujar puntos
-            ciudades.plot(
-                ax=ax,
+            xs = ciudades.geometry.x.values
+            ys = ciudades.geometry.y.values
+            nombres = ciudades[col_nombre].values
+
+            # Dibujar todos los puntos en una sola PathCollection
+            ax.scatter(
+                xs, ys,
+                s=20,
                 color=c.get("indicador_norte", "#1a3c6e"),
-                markersize=20,
                 alpha=0.8,
-                edgecolor=c.get("texto_stroke", "#ffffff"),
-                linewidth=0.5,
+                edgecolors=c.get("texto_stroke", "#ffffff"),
+                linewidths=0.5,
                 zorder=5
             )
 
-            # Etiquetas de ciudades
-            for idx, row in ciudades.iterrows():
-                nombre = row.get(col_nombre, "")
-                if not nombre:
+            # Tamaño de fuente según población (calculado de una vez)
+            if col_pop:
+                pop = ciudades[col_pop].fillna(0).values
+                tamaños = np.select(
+                    [pop > 500000, pop > 100000, pop > 50000], [10, 9, 8], default=7
+                )
+            else:
+                tamaños = np.full(len(ciudades), 7)
+
+            # Etiquetas de ciudades: un solo desplazamiento (5, 5) pt y un
+            # solo path effect compartidos por todos los textos
+            desplazamiento = offset_copy(ax.transData, fig=fig, x=5, y=5, units="points")
+            contorno_texto = [
+                pe.withStroke(linewidth=2, foreground=c.get("texto_stroke", "#ffffff"))
+            ]
+            for nombre, x, y, fontsize in zip(nombres, xs, ys, tamaños):
+                if not isinstance(nombre, str) or not nombre:
                     continue
-                x = row.geometry.x
-                y = row.geometry.y
-
-                # Tamaño de fuente según población
-                fontsize = 7
-                if col_pop and row.get(col_pop, 0):
-                    pop = row[col_pop]
-                    if pop > 500000:
-                        fontsize = 10
-                    elif pop > 100000:
-                        fontsize = 9
-                    elif pop > 50000:
-                        fontsize = 8
-
-                ax.annotate(
-                    nombre,
-                    xy=(x, y),
-                    xytext=(5, 5),
-                    textcoords="offset points",
+                ax.text(
+                    x, y, nombre,
+                    transform=desplazamiento,
                     fontsize=fontsize,
                     color=c.get("texto_etiquetas", "#1a1a1a"),
-                    path_effects=[
-                        pe.withStroke(
-                            linewidth=2,
-                            foreground=c.get("texto_stroke", "#ffffff")
-                        )
-                    ],
+                    path_effects=contorno_texto,
                     zorder=6
                 )
+        del ciudades
 
     # ─── Configurar límites ───────────────────────────────────────────────
     ax.set_xlim(lon_min, lon_max)
@@ -560,23 +833,28 @@ def generar_mapa(datos, lat_min, lat_max, lon_min, lon_max, paleta, seleccion):
     )
 
     # ─── Guardar y mostrar ────────────────────────────────────────────────
-    plt.tight_layout()
-
+    # layout="constrained" ajusta los márgenes dentro del mismo dibujo; sin
+    # bbox_inches="tight" savefig no hace una pasada extra para medir
+    # Las capas ya salieron de `datos` y están convertidas en artistas de
+    # matplotlib; se recogen los ciclos que dejan los DataFrames antes de
+    # que savefig reserve el lienzo, para bajar el pico de memoria
+    gc.collect()
     output_file = "mapa_baja_california.png"
     plt.savefig(
-        output_file, dpi=200, bbox_inches="tight",
+        output_file, dpi=DPI_SALIDA,
         facecolor=c.get("fondo_figura", "#ffffff"), edgecolor="none"
     )
 
     print("=" * 60)
     print(f"  ✅ Mapa guardado como '{output_file}'")
-    print(f"     Resolución: 200 DPI")
+    print(f"     Resolución: {DPI_SALIDA} DPI")
     print(f"     Paleta: {c.get('nombre', 'Sin nombre')}")
     print(f"     Capas: {', '.join(capas_activas)}")
     print(f"     Área: Lat [{lat_min}°, {lat_max}°]  Lon [{lon_min}°, {lon_max}°]")
     print("=" * 60)
 
-    plt.show()
+    if matplotlib.get_backend().lower() != "agg":
+        plt.show()
     print("\n¡Listo! El mapa se ha generado exitosamente.")
 
 
@@ -611,30 +889,7 @@ if __name__ == "__main__":
     print("  CARGANDO DATOS GEOGRÁFICOS")
     print("=" * 60)
 
-    datos_cargados = {}
-
-    # Siempre cargar estados
-    if "estados" in rutas:
-        datos_cargados["estados"] = cargar_estados(
-            rutas["estados"], lat_min, lat_max, lon_min, lon_max
-        )
-
-    # Cargar datasets opcionales
-    if "ciudades" in rutas:
-        datos_cargados["ciudades"] = cargar_ciudades(
-            rutas["ciudades"], lat_min, lat_max, lon_min, lon_max
-        )
-
-    if "paises" in rutas:
-        datos_cargados["paises"] = cargar_paises(
-            rutas["paises"], lat_min, lat_max, lon_min, lon_max
-        )
-
-    if "carreteras" in rutas:
-        datos_cargados["carreteras"] = cargar_carreteras(
-            rutas["carreteras"], lat_min, lat_max, lon_min, lon_max
-        )
-
+    datos_cargados = cargar_datasets(rutas, lat_min, lat_max, lon_min, lon_max)
     print("")
 
     # Paso 6: Generar mapa
@@ -10,24 +10,39 @@ Capas de zonas:
   - Las figuras se dibujan proporcionales (100m de diámetro)
   - Al ejecutar, el usuario elige cuáles archivos de zonas activar
 
-Dependencias: geopandas, matplotlib, numpy
+Dependencias: geopandas, pyogrio, pyarrow, matplotlib, numpy
 """
 
 import os
 import json
 import math
+import functools
 import numpy as np
+import shapely
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import matplotlib.patheffects as pe
-import matplotlib.patches as mpatches
-from shapely.ops import unary_union
+from matplotlib.collections import EllipseCollection
+from shapely.geometry import box
+
+try:
+    import orjson  # opcional: decodifica JSON varias veces más rápido
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # opcional: lee los archivos de zonas en flujo, sin cargarlos enteros
+except ImportError:
+    ijson = None
 
 # ─── Configuración ────────────────────────────────────────────────────────────
 DATOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos")
 ARCHIVO_ZIP = os.path.join(DATOS_DIR, "ne_10m_admin_1_states_provinces.zip")
 ARCHIVO_PALETAS = os.path.join(DATOS_DIR, "paletas.json")
 ARCHIVO_CAPAS_ZONAS = os.path.join(DATOS_DIR, "capas_zonas.json")
+# Caché GeoParquet de los estados filtrados y del contorno ya unido
+CACHE_BAJA = os.path.join(DATOS_DIR, "baja.parquet")
+CACHE_PENINSULA = os.path.join(DATOS_DIR, "peninsula.parquet")
 URL_DATOS = (
     "https://naciscdn.org/naturalearth/10m/cultural/"
     "ne_10m_admin_1_states_provinces.zip"
@@ -39,6 +54,12 @@ LAT_MAX_DEFAULT = 33.0
 LON_MIN_DEFAULT = -120.0
 LON_MAX_DEFAULT = -108.0
 
+# Campos de cada zona que se conservan al leer los archivos en flujo (ijson)
+CAMPOS_ZONA = ("id", "nombre", "latitud", "longitud", "figura", "color")
+
+# Máximo de columnas en que se reparte la tabla de zonas cuando no cabe
+TABLA_MAX_COLUMNAS = 3
+
 # Mapeo de nombres de colores en español a códigos hex
 COLORES_ESPAÑOL = {
     "rojo":       "#e63946",
@@ -78,15 +99,22 @@ def descargar_datos():
     print(f"  URL: {URL_DATOS}")
     print("  Descargando... (esto puede tardar un momento)")
 
+    # Se escribe a un .part en bloques de 1 MiB y solo se renombra al
+    # terminar: un archivo a medias nunca queda con el nombre final
+    ruta_parcial = ARCHIVO_ZIP + ".part"
     try:
+        import shutil
         import urllib.request
-        urllib.request.urlretrieve(URL_DATOS, ARCHIVO_ZIP)
+        with urllib.request.urlopen(URL_DATOS, timeout=60) as resp, \
+                open(ruta_parcial, "wb") as f:
+            shutil.copyfileobj(resp, f, 1 << 20)
+        os.replace(ruta_parcial, ARCHIVO_ZIP)
         tamaño = os.path.getsize(ARCHIVO_ZIP) / (1024 * 1024)
         print(f"  ✅ Descarga completada ({tamaño:.1f} MB)\n")
     except Exception as e:
         print(f"  ❌ Error al descargar: {e}")
-        if os.path.exists(ARCHIVO_ZIP):
-            os.remove(ARCHIVO_ZIP)
+        if os.path.exists(ruta_parcial):
+            os.remove(ruta_parcial)
         raise
 
     return ARCHIVO_ZIP
@@ -96,13 +124,42 @@ def descargar_datos():
 #  FUNCIONES DE PALETAS
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def _leer_json(ruta):
+    """Lee un archivo JSON con orjson si está instalado, o con json si no."""
+    if orjson is not None:
+        with open(ruta, "rb") as f:
+            return orjson.loads(f.read())
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _leer_zonas(ruta, nombre_defecto):
+    """
+    Lee un archivo de zonas y retorna (nombre_capa, zonas).
+    Con ijson el archivo se recorre en flujo: cada zona se reduce a
+    CAMPOS_ZONA en cuanto se lee, así que en memoria nunca está el documento
+    completo. Sin ijson se decodifica entero con _leer_json.
+    """
+    if ijson is None:
+        data = _leer_json(ruta)
+        return data.get("nombre", nombre_defecto), data.get("zonas", [])
+
+    with open(ruta, "rb") as f:
+        nombre = next(ijson.items(f, "nombre"), nombre_defecto)
+        f.seek(0)
+        zonas = [
+            {k: z[k] for k in CAMPOS_ZONA if k in z}
+            for z in ijson.items(f, "zonas.item", use_float=True)
+        ]
+    return nombre, zonas
+
+
 def cargar_paletas():
     """Carga las paletas de colores desde el archivo JSON."""
     if not os.path.exists(ARCHIVO_PALETAS):
         return [paleta_por_defecto()]
     try:
-        with open(ARCHIVO_PALETAS, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _leer_json(ARCHIVO_PALETAS)
         paletas = data.get("paletas", [])
         if not paletas:
             return [paleta_por_defecto()]
@@ -157,8 +214,7 @@ def cargar_capas_zonas():
         return []
 
     try:
-        with open(ARCHIVO_CAPAS_ZONAS, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _leer_json(ARCHIVO_CAPAS_ZONAS)
         archivos = data.get("archivos", [])
         print(f"  ✅ Capas de zonas: {len(archivos)} archivo(s) registrado(s)")
         return archivos
@@ -233,27 +289,53 @@ def cargar_zonas(capas_activas):
         ruta = os.path.join(DATOS_DIR, archivo)
 
         try:
-            with open(ruta, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            zonas = data.get("zonas", [])
-            nombre_capa = data.get("nombre", archivo)
+            nombre_capa, zonas = _leer_zonas(ruta, archivo)
             print(f"  📂 {nombre_capa}: {len(zonas)} zonas cargadas")
 
             for z in zonas:
                 z["_archivo_origen"] = archivo
                 z["_nombre_capa"] = nombre_capa
+                z["_hex"] = resolver_color(z.get("color", "rojo"))
             todas_zonas.extend(zonas)
 
         except Exception as e:
             print(f"  ❌ Error al leer {archivo}: {e}")
 
+    # Color de texto del ID resuelto aquí, una vez por color distinto, para
+    # que el dibujo no haga ningún trabajo con cadenas
+    contraste = _colores_texto_contraste(z["_hex"] for z in todas_zonas)
+    for z in todas_zonas:
+        z["_texto"] = contraste[z["_hex"]]
+
     if todas_zonas:
         print(f"  Total de zonas: {len(todas_zonas)}\n")
     return todas_zonas
 
 
+def indexar_zonas(zonas):
+    """
+    Construye una sola vez un STRtree con el punto de cada zona, para que
+    cada consulta por área recorra el árbol en C (O(log N + k)) en lugar
+    de revisar todas las zonas.
+    """
+    lat = np.array([z.get("latitud", 0) for z in zonas], dtype=np.float64)
+    lon = np.array([z.get("longitud", 0) for z in zonas], dtype=np.float64)
+    return {"arbol": shapely.STRtree(shapely.points(lon, lat))}
+
+
+def zonas_en_area(zonas, indice, lat_min, lat_max, lon_min, lon_max):
+    """Devuelve las zonas cuyo punto cae dentro del área, en su orden original."""
+    area = box(lon_min, lat_min, lon_max, lat_max)
+    idxs = np.sort(indice["arbol"].query(area, predicate="intersects"))
+    return [zonas[i] for i in idxs]
+
+
+@functools.lru_cache(maxsize=1024)
 def resolver_color(nombre_color):
-    """Convierte un nombre de color en español a código hex."""
+    """
+    Convierte un nombre de color en español a código hex.
+    Se memoriza: cada nombre distinto se normaliza una sola vez.
+    """
     nombre = nombre_color.lower().strip()
     if nombre in COLORES_ESPAÑOL:
         return COLORES_ESPAÑOL[nombre]
@@ -314,39 +396,89 @@ def pedir_coordenadas():
 #  CARGA DE DATOS CARTOGRÁFICOS
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def _cache_vigente(archivo):
+    """True si ambos archivos de caché existen y son más nuevos que el ZIP."""
+    fuente = os.path.getmtime(archivo)
+    return all(
+        os.path.exists(ruta) and os.path.getmtime(ruta) >= fuente
+        for ruta in (CACHE_BAJA, CACHE_PENINSULA)
+    )
+
+
+def _guardar_parquet(gdf, ruta):
+    """
+    Escribe el GeoParquet en un .part y lo renombra al terminar: una
+    ejecución interrumpida nunca deja una caché truncada con el nombre final.
+    """
+    ruta_parcial = ruta + ".part"
+    try:
+        gdf.to_parquet(ruta_parcial)
+        os.replace(ruta_parcial, ruta)
+    finally:
+        if os.path.exists(ruta_parcial):
+            os.remove(ruta_parcial)
+
+
 def cargar_datos(archivo):
-    """Carga el shapefile y filtra los estados de Baja California."""
+    """
+    Carga los estados de Baja California y su contorno unido.
+    Ambos dependen solo del ZIP de Natural Earth, así que se guardan como
+    GeoParquet la primera vez y en las siguientes ejecuciones se leen de ahí
+    sin volver a parsear el shapefile ni recalcular la unión.
+    Retorna (baja, peninsula_unida).
+    """
     print("  Cargando datos cartográficos...")
-    gdf = gpd.read_file(f"zip://{archivo}")
-
-    estados_peninsula = ["Baja California", "Baja California Sur"]
-    baja = gdf[
-        (gdf["admin"] == "Mexico") &
-        (gdf["name"].isin(estados_peninsula))
-    ].copy()
+    if _cache_vigente(archivo):
+        try:
+            baja = gpd.read_parquet(CACHE_BAJA)
+            peninsula_unida = gpd.read_parquet(CACHE_PENINSULA).geometry.iloc[0]
+            print(f"  ⚡ Desde caché — Estados: {list(baja['name'].values)}")
+            return baja, peninsula_unida
+        except Exception as e:
+            print(f"  ⚠️  Caché ilegible ({e}), se lee el shapefile.")
+
+    # pyogrio + Arrow: lectura columnar en C; GDAL aplica el filtro por país
+    # y por nombre, así que solo salen de la capa C los estados de la península
+    def leer_estados(filtro):
+        return gpd.read_file(
+            f"zip://{archivo}",
+            engine="pyogrio",
+            use_arrow=True,
+            columns=["admin", "name"],
+            where=f"admin = 'Mexico' AND {filtro}",
+        )
 
+    baja = leer_estados("name IN ('Baja California', 'Baja California Sur')")
     if baja.empty:
-        mexico_states = gdf[gdf["admin"] == "Mexico"]
-        baja = mexico_states[
-            mexico_states["name"].str.contains("Baja", case=False, na=False)
-        ].copy()
+        baja = leer_estados("name LIKE '%Baja%'")
 
     print(f"  Estados: {list(baja['name'].values)}")
-    return baja
+    peninsula_unida = shapely.union_all(baja.geometry.values)
+
+    try:
+        _guardar_parquet(baja, CACHE_BAJA)
+        _guardar_parquet(
+            gpd.GeoDataFrame(geometry=[peninsula_unida], crs=baja.crs), CACHE_PENINSULA
+        )
+    except Exception as e:
+        print(f"  ⚠️  No se pudo guardar la caché: {e}")
+
+    return baja, peninsula_unida
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 #  GENERACIÓN DEL MAPA
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta, zonas):
-    """Genera el mapa con contorno + zonas + tabla de referencia."""
+def generar_mapa(baja, peninsula_unida, lat_min, lat_max, lon_min, lon_max, paleta,
+                 zonas, indice_zonas):
+    """
+    Genera el mapa con contorno + zonas + tabla de referencia.
+    indice_zonas es el resultado de indexar_zonas(zonas).
+    """
 
     c = paleta
 
-    # Unir geometrías
-    peninsula_unida = unary_union(baja.geometry)
-
     # Proporciones
     ancho = lon_max - lon_min
     alto = lat_max - lat_min
@@ -359,37 +491,57 @@ def generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta, zonas):
             1, 2,
             figsize=(14, fig_alto),
             gridspec_kw={"width_ratios": [1, 3]},
-            facecolor=c.get("fondo_figura", "#ffffff")
+            facecolor=c.get("fondo_figura", "#ffffff"),
+            layout="constrained"
         )
     else:
         fig, ax = plt.subplots(
             1, 1,
             figsize=(10, fig_alto),
-            facecolor=c.get("fondo_figura", "#ffffff")
+            facecolor=c.get("fondo_figura", "#ffffff"),
+            layout="constrained"
         )
         ax_tabla = None
 
     ax.set_facecolor(c.get("fondo_mapa", "#ffffff"))
 
+    # ─── Recorte al área visible + simplificación ─────────────────────────
+    # GEOS descarta una sola vez los vértices fuera de la ventana, en lugar de
+    # que matplotlib los procese y recorte al dibujar. La ventana se amplía un
+    # 2% para que los bordes creados por el corte queden fuera de los ejes y
+    # no se dibujen como contorno sobre el marco. Después, ~1/2000 del
+    # ancho visible como tolerancia: los vértices más finos no se distinguen
+    margen = 0.02 * max(ancho, alto)
+    ventana = box(lon_min - margen, lat_min - margen, lon_max + margen, lat_max + margen)
+    tolerancia = ancho / 2000
+    baja_vista = gpd.clip(baja, ventana)
+    baja_vista["geometry"] = baja_vista.geometry.simplify(tolerancia, preserve_topology=True)
+    peninsula_vista = peninsula_unida.intersection(ventana).simplify(
+        tolerancia, preserve_topology=True
+    )
+
     # ─── Relleno ──────────────────────────────────────────────────────────
-    baja.plot(
+    # Relleno y contorno se rasterizan; las divisiones quedan vectoriales
+    baja_vista.plot(
         ax=ax,
         color=c.get("relleno_tierra", "#f5e6ca"),
         edgecolor="none",
-        alpha=0.8
+        alpha=0.8,
+        rasterized=True
     )
 
     # ─── Contorno unificado ───────────────────────────────────────────────
-    gpd.GeoSeries([peninsula_unida]).plot(
+    gpd.GeoSeries([peninsula_vista]).plot(
         ax=ax,
         facecolor="none",
         edgecolor=c.get("contorno", "#1a3c6e"),
         linewidth=1.5,
-        alpha=0.9
+        alpha=0.9,
+        rasterized=True
     )
 
     # ─── División entre estados ───────────────────────────────────────────
-    baja.boundary.plot(
+    baja_vista.boundary.plot(
         ax=ax,
         edgecolor=c.get("division_estados", "#cc3333"),
         linewidth=1.0,
@@ -397,12 +549,14 @@ def generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta, zonas):
         alpha=0.6
     )
 
-    # ─── Etiquetas de estados ─────────────────────────────────────────────
-    for idx, row in baja.iterrows():
-        centroid = row.geometry.centroid
+    # ─── Etiquetas de estados (centroides de la geometría completa) ───────
+    # Centroides en un solo lote de GEOS, sin objetos Point por fila
+    centroides = shapely.centroid(baja.geometry.values)
+    xs, ys = shapely.get_x(centroides), shapely.get_y(centroides)
+    for nombre, x, y in zip(baja["name"].to_numpy(), xs, ys):
         ax.annotate(
-            row["name"],
-            xy=(centroid.x, centroid.y),
+            nombre,
+            xy=(x, y),
             fontsize=11, fontweight="bold",
             color=c.get("texto_etiquetas", "#1a1a1a"),
             ha="center", va="center",
@@ -411,14 +565,16 @@ def generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta, zonas):
             ]
         )
 
+    # ─── Configurar límites ───────────────────────────────────────────────
+    ax.set_xlim(lon_min, lon_max)
+    ax.set_ylim(lat_min, lat_max)
+
     # ─── DIBUJAR ZONAS (solo las visibles dentro del área) ───────────────
     zonas_visibles = []
     if zonas:
-        zonas_visibles = [
-            z for z in zonas
-            if lat_min <= z.get("latitud", 0) <= lat_max
-            and lon_min <= z.get("longitud", 0) <= lon_max
-        ]
+        zonas_visibles = zonas_en_area(
+            zonas, indice_zonas, lat_min, lat_max, lon_min, lon_max
+        )
         if zonas_visibles:
             dibujar_zonas(ax, zonas_visibles, lat_min, lat_max, lon_min, lon_max, c)
             dibujar_tabla(ax_tabla, zonas_visibles, c)
@@ -430,10 +586,6 @@ def generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta, zonas):
             if ax_tabla is not None:
                 ax_tabla.axis("off")
 
-    # ─── Configurar límites ───────────────────────────────────────────────
-    ax.set_xlim(lon_min, lon_max)
-    ax.set_ylim(lat_min, lat_max)
-
     # ─── Título ───────────────────────────────────────────────────────────
     ax.set_title(
         "Península de Baja California",
@@ -490,11 +642,11 @@ def generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta, zonas):
     )
 
     # ─── Guardar y mostrar ────────────────────────────────────────────────
-    plt.tight_layout()
-
+    # layout="constrained" ajusta los márgenes dentro del mismo dibujo; sin
+    # bbox_inches="tight" savefig no hace una pasada extra para medir
     output_file = "mapa_baja_california.png"
     plt.savefig(
-        output_file, dpi=200, bbox_inches="tight",
+        output_file, dpi=200,
         facecolor=c.get("fondo_figura", "#ffffff"), edgecolor="none"
     )
 
@@ -512,66 +664,92 @@ def generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta, zonas):
 
 
 def dibujar_zonas(ax, zonas, lat_min, lat_max, lon_min, lon_max, paleta):
-    """Dibuja las zonas de interés con un círculo de color y el ID adentro."""
+    """
+    Dibuja las zonas de interés con un círculo de color y el ID adentro.
+    Recibe solo zonas ya filtradas al área visible (ver zonas_en_area).
+    """
 
     # Calcular tamaño del marcador proporcional al área visible
     rango_lat = lat_max - lat_min
     # Radio visual: ~0.8% del rango de latitud para ser visible
     radio_visual = rango_lat * 0.008
 
-    for zona in zonas:
-        lat = zona.get("latitud", 0)
-        lon = zona.get("longitud", 0)
-        zona_id = zona.get("id", "?")
-        color_nombre = zona.get("color", "rojo")
-        color = resolver_color(color_nombre)
-
-        # Verificar que esté dentro del área visible
-        if not (lat_min <= lat <= lat_max and lon_min <= lon <= lon_max):
-            continue
-
-        # Factor de corrección para longitud (los grados no son cuadrados)
-        cos_lat = math.cos(math.radians(lat))
-        radio_lon = radio_visual / cos_lat if cos_lat > 0 else radio_visual
-
-        # Dibujar círculo de color
-        circulo = mpatches.Ellipse(
-            (lon, lat),
-            width=radio_lon * 2,
-            height=radio_visual * 2,
-            facecolor=color,
-            edgecolor="black",
-            linewidth=1.0,
+    lons = np.array([z.get("longitud", 0) for z in zonas], dtype=np.float64)
+    lats = np.array([z.get("latitud", 0) for z in zonas], dtype=np.float64)
+    colores = [z["_hex"] for z in zonas]
+
+    # Factor de corrección para longitud (los grados no son cuadrados)
+    cos_lat = np.cos(np.radians(lats))
+    radios_lon = np.where(
+        cos_lat > 0, radio_visual / np.maximum(cos_lat, 1e-12), radio_visual
+    )
+
+    # Una EllipseCollection por color, medida en unidades de datos (units="xy"):
+    # el tamaño no depende de la escala de los ejes, así que sigue exacto
+    # cuando constrained layout o un cambio de ventana redimensionan el mapa.
+    # Con la paleta de COLORES_ESPAÑOL son a lo sumo una docena de artistas.
+    grupos = {}
+    for i, color in enumerate(colores):
+        grupos.setdefault(color, []).append(i)
+    for color, idxs in grupos.items():
+        circulos = EllipseCollection(
+            widths=2 * radios_lon[idxs],
+            heights=np.full(len(idxs), 2 * radio_visual),
+            angles=np.zeros(len(idxs)),
+            units="xy",
+            offsets=np.column_stack([lons[idxs], lats[idxs]]),
+            offset_transform=ax.transData,
+            facecolors=color,
+            edgecolors="black",
+            linewidths=1.0,
             alpha=0.85,
             zorder=5
         )
-        ax.add_patch(circulo)
+        ax.add_collection(circulos, autolim=False)
 
-        # ID centrado dentro del círculo
-        # Elegir color de texto (blanco o negro) según brillo del fondo
-        texto_color = _color_texto_contraste(color)
+    # ID centrado dentro de cada círculo
+    # Color de texto (blanco o negro) ya resuelto en cargar_zonas contra el
+    # relleno del círculo, así que no hace falta el halo: sin path_effects
+    # cada etiqueta se dibuja en una sola pasada en lugar de dos
+    for lon, lat, zona in zip(lons, lats, zonas):
         ax.text(
-            lon, lat, str(zona_id),
+            lon, lat, str(zona.get("id", "?")),
             ha="center", va="center",
             fontsize=7, fontweight="bold",
-            color=texto_color,
-            zorder=6,
-            path_effects=[
-                pe.withStroke(linewidth=1.5, foreground="black" if texto_color == "white" else "white")
-            ]
+            color=zona["_texto"],
+            zorder=6
         )
 
 
-def _color_texto_contraste(hex_color):
-    """Devuelve 'white' o 'black' según el brillo del color de fondo."""
-    try:
-        h = hex_color.lstrip("#")
-        r, g, b = int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
-        # Luminancia relativa
-        brillo = (0.299 * r + 0.587 * g + 0.114 * b) / 255
-        return "white" if brillo < 0.5 else "black"
-    except Exception:
-        return "black"
+def _colores_texto_contraste(colores_hex):
+    """
+    Decide 'white' o 'black' para cada color de fondo distinto, calculando
+    la luminancia de todos en un solo paso. Retorna {color: color_texto}.
+    Lo que no sea un hex de al menos 6 dígitos se resuelve como 'black'.
+    """
+    contraste = {}
+    validos, empaquetados = [], []
+    for color in set(colores_hex):
+        digitos = color.lstrip("#")[:6]
+        try:
+            rgb = int(digitos, 16) if len(digitos) == 6 else None
+        except ValueError:
+            rgb = None
+        if rgb is None:
+            contraste[color] = "black"
+        else:
+            validos.append(color)
+            empaquetados.append(rgb)
+
+    if validos:
+        # Luminancia en punto fijo sobre RGB empaquetado en uint32: pesos
+        # 0.299/0.587/0.114 escalados a 256 (77/150/29), solo enteros
+        rgb = np.array(empaquetados, dtype=np.uint32)
+        r, g, b = (rgb >> 16) & 0xFF, (rgb >> 8) & 0xFF, rgb & 0xFF
+        oscuro = (77 * r + 150 * g + 29 * b) < 128 * 256
+        texto = np.array(["black", "white"])[oscuro.astype(np.intp)]
+        contraste.update(zip(validos, texto.tolist()))
+    return contraste
 
 
 def dibujar_tabla(ax_tabla, zonas, paleta):
@@ -593,43 +771,50 @@ def dibujar_tabla(ax_tabla, zonas, paleta):
         transform=ax_tabla.transAxes
     )
 
-    # Encabezados
+    # Encabezados (misma fuente monoespaciada que las filas, para alinear)
     y_inicio = 0.94
+    y_filas = y_inicio - 0.02
     color_enc = c.get("ejes_texto", "#333333")
-    ax_tabla.text(0.10, y_inicio, "ID", ha="center", va="top",
-                  fontsize=8, fontweight="bold", color=color_enc)
-    ax_tabla.text(0.25, y_inicio, "Nombre", ha="left", va="top",
-                  fontsize=8, fontweight="bold", color=color_enc)
+    ids = [str(zona.get("id", "?")) for zona in zonas]
+    ancho_id = max(map(len, ids), default=2)
+
+    # Tamaño de letra ajustado para que todas las filas quepan en el alto
+    # disponible del panel; si quedaría ilegible (< 4 pt), se reparten en
+    # columnas. Cada línea mide ~1.2 × tamaño × interlineado en puntos
+    n = max(len(zonas), 1)
+    interlineado = 1.3
+    alto_pt = (y_filas - 0.02) * ax_tabla.get_position().height * \
+        ax_tabla.figure.get_figheight() * 72
+    columnas = 1
+    while True:
+        filas_por_columna = math.ceil(n / columnas)
+        tamaño = min(7, alto_pt / (filas_por_columna * interlineado * 1.2))
+        if tamaño >= 4 or columnas == TABLA_MAX_COLUMNAS:
+            break
+        columnas += 1
 
     # Línea separadora
     ax_tabla.plot([0.02, 0.98], [y_inicio - 0.012, y_inicio - 0.012],
                   color=c.get("ejes_bordes", "#cccccc"), linewidth=0.8,
                   transform=ax_tabla.transAxes)
 
-    # Filas compactas
-    n = len(zonas)
-    espacio = y_inicio - 0.06
-    alto_fila = min(0.025, espacio / max(n, 1))
-
-    for i, zona in enumerate(zonas):
-        y = y_inicio - 0.025 - (i * alto_fila)
-        zona_id = zona.get("id", "?")
-        nombre = zona.get("nombre", "?")
-
-        # ID
+    # Filas: un solo Text multilínea en monoespaciada por columna, en lugar
+    # de dos artistas por zona; el ancho fijo mantiene alineados ID y nombre
+    filas = [
+        f"{zona_id:>{ancho_id}}  {zona.get('nombre', '?')}"
+        for zona_id, zona in zip(ids, zonas)
+    ]
+    ancho_columna = 0.96 / columnas
+    for i in range(columnas):
+        x = 0.04 + i * ancho_columna
+        ax_tabla.text(x, y_inicio, f"{'ID':>{ancho_id}}  Nombre", ha="left", va="top",
+                      fontsize=tamaño, fontweight="bold", family="monospace",
+                      color=color_enc, transform=ax_tabla.transAxes)
         ax_tabla.text(
-            0.10, y, str(zona_id),
-            ha="center", va="center",
-            fontsize=8, fontweight="bold",
-            color=c.get("texto_etiquetas", "#1a1a1a"),
-            transform=ax_tabla.transAxes
-        )
-
-        # Nombre
-        ax_tabla.text(
-            0.25, y, nombre,
-            ha="left", va="center",
-            fontsize=7,
+            x, y_filas,
+            "\n".join(filas[i * filas_por_columna:(i + 1) * filas_por_columna]),
+            ha="left", va="top",
+            fontsize=tamaño, family="monospace", linespacing=interlineado,
             color=c.get("texto_etiquetas", "#1a1a1a"),
             transform=ax_tabla.transAxes
         )
@@ -661,12 +846,16 @@ if __name__ == "__main__":
     capas = cargar_capas_zonas()
     capas_activas = pedir_zonas_activas(capas)
     zonas = cargar_zonas(capas_activas) if capas_activas else []
+    indice_zonas = indexar_zonas(zonas)
 
     # Paso 4: Elegir área
     lat_min, lat_max, lon_min, lon_max = pedir_coordenadas()
 
     # Paso 5: Cargar datos cartográficos
-    baja = cargar_datos(archivo)
+    baja, peninsula_unida = cargar_datos(archivo)
 
     # Paso 6: Generar mapa
-    generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta, zonas)
+    generar_mapa(
+        baja, peninsula_unida, lat_min, lat_max, lon_min, lon_max, paleta,
+        zonas, indice_zonas
+    )
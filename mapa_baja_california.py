@@ -5,30 +5,69 @@ Fuente de datos: Natural Earth (naturalearthdata.com)
   - Dataset: Admin 1 – States, Provinces (1:10m de resolución)
   - Es una fuente pública, gratuita y ampliamente utilizada en cartografía.
 
-Dependencias: geopandas, matplotlib
+Dependencias: geopandas, pyogrio, pyarrow, matplotlib
 
 Características:
   - Descarga el archivo de datos localmente y lo reutiliza en ejecuciones futuras.
-  - Pide al usuario latitud y longitud para definir el área del mapa.
+  - Guarda los estados filtrados y su contorno unido en datos/ (GeoParquet).
+  - Pide al usuario latitud y longitud para definir el área del mapa
+    (o se pasan con --bounds LAT_MIN LAT_MAX LON_MIN LON_MAX).
   - Permite elegir entre paletas de colores definidas en datos/paletas.json.
+  - Con --paleta N --bounds ... corre sin preguntas (ver --help).
 """
 
 import os
+import sys
 import json
-import geopandas as gpd
-import matplotlib.pyplot as plt
-import matplotlib.patheffects as pe
-from shapely.ops import unary_union
+import math
+import zipfile
+import hashlib
+import logging
+import argparse
+import functools
+
+try:
+    import orjson  # opcional: decodifica JSON varias veces más rápido
+except ImportError:
+    orjson = None
+
+# geopandas, shapely y matplotlib se importan dentro de las funciones que los
+# usan: cargarlos toma uno o dos segundos y así los menús aparecen al instante
+
+# Mensajes de estado y advertencias (descarga, carga, guardado, entradas no
+# válidas) van por logging a stdout; los menús interactivos siguen usando
+# print porque forman parte de las preguntas al usuario
+log = logging.getLogger(__name__)
 
 # ─── Configuración ────────────────────────────────────────────────────────────
 DATOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos")
 ARCHIVO_ZIP = os.path.join(DATOS_DIR, "ne_10m_admin_1_states_provinces.zip")
+# Shapefile de estados dentro del ZIP
+MIEMBRO_SHP = "ne_10m_admin_1_states_provinces.shp"
+# Huella SHA256 del ZIP junto con su tamaño y mtime (JSON), escrita al
+# descargarlo; solo se vuelve a calcular si el archivo cambió
+ARCHIVO_SHA256 = ARCHIVO_ZIP + ".sha256.json"
 ARCHIVO_PALETAS = os.path.join(DATOS_DIR, "paletas.json")
+# Estados de la península ya filtrados y su contorno unido (GeoParquet), para
+# no volver a leer el shapefile mundial ni recalcular la unión en cada ejecución
+CACHE_BAJA = os.path.join(DATOS_DIR, "baja_filtered.parquet")
+CACHE_PENINSULA = os.path.join(DATOS_DIR, "peninsula_unida.parquet")
 URL_DATOS = (
     "https://naciscdn.org/naturalearth/10m/cultural/"
     "ne_10m_admin_1_states_provinces.zip"
 )
 
+# Imagen generada (se puede cambiar con --output)
+ARCHIVO_SALIDA = "mapa_baja_california.png"
+
+# Resolución de la imagen exportada (también la de las capas rasterizadas)
+DPI_SALIDA = 200
+
+# Nivel de compresión DEFLATE del PNG: 1 guarda mucho más rápido con un
+# archivo algo más grande; 9 (--final) da el archivo más chico
+COMPRESION_PNG_RAPIDA = 1
+COMPRESION_PNG_FINAL = 9
+
 # Valores por defecto para la Península de Baja California
 LAT_MIN_DEFAULT = 22.0
 LAT_MAX_DEFAULT = 33.0
@@ -37,64 +76,161 @@ LON_MAX_DEFAULT = -108.0
 
 
 # ─── 1. Descargar datos (solo si no existen localmente) ───────────────────────
+def _sha256_archivo(ruta):
+    """Huella SHA256 de un archivo, leída en bloques de 1 MiB."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _guardar_huella(huella):
+    """Guarda la huella junto con el tamaño y mtime actuales del ZIP."""
+    info = os.stat(ARCHIVO_ZIP)
+    with open(ARCHIVO_SHA256, "w", encoding="utf-8") as f:
+        json.dump(
+            {"sha256": huella, "tamaño": info.st_size, "mtime_ns": info.st_mtime_ns}, f
+        )
+
+
+def _leer_huella():
+    """Huella guardada ({sha256, tamaño, mtime_ns}) o None si no hay una válida."""
+    try:
+        with open(ARCHIVO_SHA256, "r", encoding="utf-8") as f:
+            huella = json.load(f)
+        return huella if {"sha256", "tamaño", "mtime_ns"} <= huella.keys() else None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _zip_legible():
+    """
+    True si el ZIP abre, sus CRC son correctos y contiene el shapefile de
+    estados. Sirve para los ZIP que no tienen huella con la cual compararse.
+    """
+    try:
+        with zipfile.ZipFile(ARCHIVO_ZIP) as zf:
+            return zf.testzip() is None and MIEMBRO_SHP in zf.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+def _zip_integro():
+    """
+    True si el ZIP local coincide con la huella guardada al descargarlo.
+    Si el tamaño y el mtime no cambiaron desde la última verificación no se
+    vuelve a leer el archivo; solo se calcula el SHA256 cuando cambiaron.
+    Un ZIP sin huella (descargado por una versión anterior) se revisa con
+    zipfile; si está completo se registra su huella actual.
+    """
+    info = os.stat(ARCHIVO_ZIP)
+    huella = _leer_huella()
+    if (huella is not None and huella["tamaño"] == info.st_size
+            and huella["mtime_ns"] == info.st_mtime_ns):
+        return True
+
+    if huella is None and not _zip_legible():
+        return False
+    actual = _sha256_archivo(ARCHIVO_ZIP)
+    if huella is None or huella["sha256"] == actual:
+        _guardar_huella(actual)
+        return True
+    return False
+
+
 def descargar_datos():
-    """Descarga el archivo ZIP de Natural Earth si no existe localmente."""
+    """
+    Descarga el archivo ZIP de Natural Earth si no existe localmente, o si
+    el que existe no coincide con su huella SHA256 o, si no tiene huella,
+    no pasa la revisión de zipfile (archivo dañado).
+    """
     if os.path.exists(ARCHIVO_ZIP):
-        tamaño = os.path.getsize(ARCHIVO_ZIP) / (1024 * 1024)
-        print(f"✅ Archivo de datos encontrado localmente: {ARCHIVO_ZIP}")
-        print(f"   Tamaño: {tamaño:.1f} MB")
-        print(f"   No es necesario descargar de nuevo.\n")
-        return ARCHIVO_ZIP
+        if _zip_integro():
+            tamaño = os.path.getsize(ARCHIVO_ZIP) / (1024 * 1024)
+            log.info("✅ Archivo de datos encontrado localmente: %s", ARCHIVO_ZIP)
+            log.info("   Tamaño: %.1f MB", tamaño)
+            log.info("   No es necesario descargar de nuevo.\n")
+            return ARCHIVO_ZIP
+        log.warning("⚠️  El archivo de datos está dañado o no coincide con su huella SHA256.")
+        log.warning("   Se descarga de nuevo.\n")
+        os.remove(ARCHIVO_ZIP)
 
     # Crear directorio si no existe
     os.makedirs(DATOS_DIR, exist_ok=True)
 
-    print("=" * 60)
-    print("  DESCARGANDO DATOS DE NATURAL EARTH")
-    print("=" * 60)
-    print(f"  Fuente: https://www.naturalearthdata.com/")
-    print(f"  Dataset: Admin 1 – States, Provinces (1:10m)")
-    print(f"  URL: {URL_DATOS}")
-    print(f"  Destino: {ARCHIVO_ZIP}")
-    print("")
-    print("  Descargando... (esto puede tardar un momento)")
-
+    log.info("=" * 60)
+    log.info("  DESCARGANDO DATOS DE NATURAL EARTH")
+    log.info("=" * 60)
+    log.info("  Fuente: https://www.naturalearthdata.com/")
+    log.info("  Dataset: Admin 1 – States, Provinces (1:10m)")
+    log.info("  URL: %s", URL_DATOS)
+    log.info("  Destino: %s", ARCHIVO_ZIP)
+    log.info("")
+    log.info("  Descargando... (esto puede tardar un momento)")
+
+    # Se escribe a un .part en bloques de 1 MiB y solo se renombra al
+    # terminar: un archivo a medias nunca queda con el nombre final. La
+    # huella se calcula sobre los mismos bloques, sin releer el archivo
+    ruta_parcial = ARCHIVO_ZIP + ".part"
     try:
         import urllib.request
-        urllib.request.urlretrieve(URL_DATOS, ARCHIVO_ZIP)
+        h = hashlib.sha256()
+        with urllib.request.urlopen(URL_DATOS, timeout=60) as resp, \
+                open(ruta_parcial, "wb") as f:
+            for bloque in iter(lambda: resp.read(1 << 20), b""):
+                h.update(bloque)
+                f.write(bloque)
+        os.replace(ruta_parcial, ARCHIVO_ZIP)
+        _guardar_huella(h.hexdigest())
         tamaño = os.path.getsize(ARCHIVO_ZIP) / (1024 * 1024)
-        print(f"  ✅ Descarga completada ({tamaño:.1f} MB)")
-        print(f"  Archivo guardado en: {ARCHIVO_ZIP}")
-        print(f"  En futuras ejecuciones se usará este archivo local.\n")
+        log.info("  ✅ Descarga completada (%.1f MB)", tamaño)
+        log.info("  Archivo guardado en: %s", ARCHIVO_ZIP)
+        log.info("  SHA256: %s", h.hexdigest())
+        log.info("  En futuras ejecuciones se usará este archivo local.\n")
     except Exception as e:
-        print(f"  ❌ Error al descargar: {e}")
-        if os.path.exists(ARCHIVO_ZIP):
-            os.remove(ARCHIVO_ZIP)
+        log.error("  ❌ Error al descargar: %s", e)
+        if os.path.exists(ruta_parcial):
+            os.remove(ruta_parcial)
         raise
 
     return ARCHIVO_ZIP
 
 
 # ─── 2. Cargar paletas de colores ─────────────────────────────────────────────
+@functools.lru_cache(maxsize=8)
+def _leer_paletas(ruta, mtime, tamaño):
+    """
+    Decodifica el JSON de paletas (con orjson si está instalado).
+    mtime y tamaño solo forman parte de la clave de la caché: si el archivo
+    cambia, la siguiente llamada lo vuelve a leer.
+    """
+    if orjson is not None:
+        with open(ruta, "rb") as f:
+            return orjson.loads(f.read())
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 def cargar_paletas():
     """Carga las paletas de colores desde el archivo JSON."""
     if not os.path.exists(ARCHIVO_PALETAS):
-        print(f"  ⚠️  No se encontró el archivo de paletas: {ARCHIVO_PALETAS}")
-        print(f"  Usando paleta por defecto.\n")
+        log.warning("  ⚠️  No se encontró el archivo de paletas: %s", ARCHIVO_PALETAS)
+        log.warning("  Usando paleta por defecto.\n")
         return [paleta_por_defecto()]
 
     try:
-        with open(ARCHIVO_PALETAS, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        info = os.stat(ARCHIVO_PALETAS)
+        data = _leer_paletas(ARCHIVO_PALETAS, info.st_mtime_ns, info.st_size)
         paletas = data.get("paletas", [])
         if not paletas:
-            print("  ⚠️  El archivo de paletas está vacío. Usando paleta por defecto.\n")
+            log.warning("  ⚠️  El archivo de paletas está vacío. Usando paleta por defecto.\n")
             return [paleta_por_defecto()]
-        print(f"  ✅ Se cargaron {len(paletas)} paletas desde: {ARCHIVO_PALETAS}\n")
+        log.info("  ✅ Se cargaron %d paletas desde: %s\n", len(paletas), ARCHIVO_PALETAS)
         return paletas
     except Exception as e:
-        print(f"  ❌ Error al leer paletas: {e}")
-        print(f"  Usando paleta por defecto.\n")
+        log.error("  ❌ Error al leer paletas: %s", e)
+        log.error("  Usando paleta por defecto.\n")
         return [paleta_por_defecto()]
 
 
@@ -143,26 +279,34 @@ def pedir_paleta(paletas):
     entrada = input(f"  Elige una paleta [1]: ").strip()
 
     if entrada == "":
-        seleccion = 0
+        numero = 1
     else:
         try:
-            seleccion = int(entrada) - 1
+            numero = int(entrada)
         except ValueError:
-            print("  ⚠️  Valor no válido. Usando paleta 1.")
-            seleccion = 0
+            log.warning("  ⚠️  Valor no válido. Usando paleta 1.")
+            numero = 1
+
+    return elegir_paleta(paletas, numero)
 
-    if seleccion < 0 or seleccion >= len(paletas):
-        print(f"  ⚠️  Opción fuera de rango. Usando paleta 1.")
-        seleccion = 0
 
-    elegida = paletas[seleccion]
-    print(f"\n  🎨 Paleta seleccionada: {elegida.get('nombre', 'Sin nombre')}\n")
+def elegir_paleta(paletas, numero):
+    """Paleta por su número en el menú (desde 1); fuera de rango usa la 1."""
+    if numero < 1 or numero > len(paletas):
+        log.warning("  ⚠️  Opción fuera de rango. Usando paleta 1.")
+        numero = 1
+
+    elegida = paletas[numero - 1]
+    log.info("\n  🎨 Paleta seleccionada: %s\n", elegida.get("nombre", "Sin nombre"))
     return elegida
 
 
 # ─── 4. Pedir coordenadas al usuario ─────────────────────────────────────────
 def pedir_coordenadas():
-    """Pide al usuario las coordenadas de latitud y longitud para el mapa."""
+    """
+    Pide el área del mapa en una sola línea: lat_min lat_max lon_min lon_max.
+    Con ENTER (o una entrada no válida) se usan los valores por defecto.
+    """
     print("=" * 60)
     print("  CONFIGURACIÓN DEL ÁREA DEL MAPA")
     print("=" * 60)
@@ -171,70 +315,161 @@ def pedir_coordenadas():
     print(f"    Longitud: {LON_MIN_DEFAULT}° a {LON_MAX_DEFAULT}°")
     print("")
     print("  Presiona ENTER para usar los valores por defecto,")
-    print("  o escribe nuevos valores.")
+    print("  o escribe los cuatro valores separados por espacios.")
     print("-" * 60)
 
-    entrada = input(f"  Latitud mínima  [{LAT_MIN_DEFAULT}]: ").strip()
-    lat_min = float(entrada) if entrada else LAT_MIN_DEFAULT
+    defecto = (LAT_MIN_DEFAULT, LAT_MAX_DEFAULT, LON_MIN_DEFAULT, LON_MAX_DEFAULT)
+    entrada = input(
+        f"  lat_min lat_max lon_min lon_max [{' '.join(map(str, defecto))}]: "
+    ).strip()
 
-    entrada = input(f"  Latitud máxima  [{LAT_MAX_DEFAULT}]: ").strip()
-    lat_max = float(entrada) if entrada else LAT_MAX_DEFAULT
+    if entrada == "":
+        area = defecto
+    else:
+        try:
+            area = tuple(map(float, entrada.replace(",", " ").split()))
+            if len(area) != 4:
+                raise ValueError
+        except ValueError:
+            log.warning("  ⚠️  Se esperaban 4 números. Usando valores por defecto.")
+            area = defecto
 
-    entrada = input(f"  Longitud mínima [{LON_MIN_DEFAULT}]: ").strip()
-    lon_min = float(entrada) if entrada else LON_MIN_DEFAULT
+    return normalizar_area(*area)
 
-    entrada = input(f"  Longitud máxima [{LON_MAX_DEFAULT}]: ").strip()
-    lon_max = float(entrada) if entrada else LON_MAX_DEFAULT
 
+def normalizar_area(lat_min, lat_max, lon_min, lon_max):
+    """Ordena los límites del área (mínimo < máximo) y los muestra."""
     if lat_min >= lat_max:
-        print("  ⚠️  Latitud mínima debe ser menor que la máxima. Intercambiando...")
+        log.warning("  ⚠️  Latitud mínima debe ser menor que la máxima. Intercambiando...")
         lat_min, lat_max = lat_max, lat_min
 
     if lon_min >= lon_max:
-        print("  ⚠️  Longitud mínima debe ser menor que la máxima. Intercambiando...")
+        log.warning("  ⚠️  Longitud mínima debe ser menor que la máxima. Intercambiando...")
         lon_min, lon_max = lon_max, lon_min
 
-    print(f"\n  📍 Área seleccionada:")
-    print(f"     Latitud:  {lat_min}° a {lat_max}°")
-    print(f"     Longitud: {lon_min}° a {lon_max}°\n")
+    log.info("\n  📍 Área seleccionada:")
+    log.info("     Latitud:  %s° a %s°", lat_min, lat_max)
+    log.info("     Longitud: %s° a %s°\n", lon_min, lon_max)
 
     return lat_min, lat_max, lon_min, lon_max
 
 
 # ─── 5. Cargar y filtrar datos ────────────────────────────────────────────────
-def cargar_datos(archivo):
-    """Carga el shapefile y filtra los estados de Baja California."""
-    print("Cargando datos geográficos...")
-    gdf = gpd.read_file(f"zip://{archivo}")
-    print(f"  Total de registros cargados: {len(gdf)}")
+def _cache_vigente(archivo):
+    """True si ambos archivos de caché existen y son más nuevos que el ZIP."""
+    fuente = os.path.getmtime(archivo)
+    return all(
+        os.path.exists(ruta) and os.path.getmtime(ruta) >= fuente
+        for ruta in (CACHE_BAJA, CACHE_PENINSULA)
+    )
 
-    estados_peninsula = ["Baja California", "Baja California Sur"]
-    baja = gdf[
-        (gdf["admin"] == "Mexico") &
-        (gdf["name"].isin(estados_peninsula))
-    ].copy()
 
-    if baja.empty:
-        print("  Buscando estados con coincidencia parcial...")
-        mexico_states = gdf[gdf["admin"] == "Mexico"]
-        baja = mexico_states[
-            mexico_states["name"].str.contains("Baja", case=False, na=False)
-        ].copy()
+def _guardar_parquet(gdf, ruta):
+    """
+    Escribe el GeoParquet en un .part y lo renombra al terminar: una
+    ejecución interrumpida nunca deja una caché truncada con el nombre final.
+    """
+    ruta_parcial = ruta + ".part"
+    try:
+        gdf.to_parquet(ruta_parcial)
+        os.replace(ruta_parcial, ruta)
+    finally:
+        if os.path.exists(ruta_parcial):
+            os.remove(ruta_parcial)
+
+
+def cargar_datos(archivo, lat_min, lat_max, lon_min, lon_max):
+    """
+    Carga los estados de Baja California que tocan el área pedida y el
+    contorno unido de la península.
+    La primera vez lee el shapefile con pyogrio (el filtro por atributos lo
+    aplica GDAL), une los estados y guarda ambos en GeoParquet; las
+    siguientes ejecuciones leen solo esa caché. El área se aplica después
+    en memoria, para que la misma caché sirva para cualquier área.
+    Retorna (baja, peninsula_unida).
+    """
+    import shapely
+    import geopandas as gpd
+
+    log.info("Cargando datos geográficos...")
+    baja = None
+    if _cache_vigente(archivo):
+        try:
+            baja = gpd.read_parquet(CACHE_BAJA)
+            peninsula_unida = gpd.read_parquet(CACHE_PENINSULA).geometry.iloc[0]
+            log.info("  ⚡ Estados leídos de la caché local.")
+        except Exception as e:
+            # Si falla cualquiera de los dos archivos se rehacen ambos
+            baja = None
+            log.warning("  ⚠️  Caché ilegible (%s), se lee el shapefile.", e)
+
+    if baja is None:
+        # /vsizip/: GDAL lee el .shp directo del ZIP sin pasar por el
+        # manejador de Python, y solo se decodifican las columnas usadas
+        def leer_estados(filtro):
+            return gpd.read_file(
+                f"/vsizip/{archivo}/{MIEMBRO_SHP}",
+                engine="pyogrio",
+                columns=["admin", "name"],
+                where=f"admin = 'Mexico' AND {filtro}",
+            )
+
+        baja = leer_estados("name IN ('Baja California', 'Baja California Sur')")
+
+        if baja.empty:
+            log.info("  Buscando estados con coincidencia parcial...")
+            baja = leer_estados("name LIKE '%Baja%'")
+
+        # Unión vectorizada de shapely 2, una sola vez: el contorno ya no se
+        # recalcula al dibujar
+        peninsula_unida = shapely.union_all(baja.geometry.values)
+
+        try:
+            _guardar_parquet(baja, CACHE_BAJA)
+            _guardar_parquet(
+                gpd.GeoDataFrame(geometry=[peninsula_unida], crs=baja.crs),
+                CACHE_PENINSULA
+            )
+        except Exception as e:
+            log.warning("  ⚠️  No se pudo guardar la caché: %s", e)
 
-    print(f"  Estados encontrados: {list(baja['name'].values)}\n")
-    return baja
+    # Solo los estados cuyo rectángulo envolvente toca el área
+    baja = baja.cx[lon_min:lon_max, lat_min:lat_max]
+
+    log.info("  Estados encontrados: %s\n", list(baja["name"].values))
+    return baja, peninsula_unida
 
 
 # ─── 6. Generar el mapa ──────────────────────────────────────────────────────
-def generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta):
-    """Genera el mapa con el contorno de la península usando la paleta elegida."""
+def _trayectoria_anillos(geometria):
+    """Path compuesto con todos los anillos de un (Multi)Polygon."""
+    import shapely
+    from matplotlib.path import Path
+
+    anillos = shapely.get_rings(shapely.get_parts(geometria))
+    return Path.make_compound_path(
+        *[Path(shapely.get_coordinates(a)) for a in anillos]
+    )
+
+
+def generar_mapa(baja, peninsula_unida, lat_min, lat_max, lon_min, lon_max, paleta,
+                 final=False, output_file=ARCHIVO_SALIDA):
+    """
+    Genera el mapa con el contorno de la península usando la paleta elegida.
+    peninsula_unida es el contorno ya unido que devuelve cargar_datos.
+    Con final=True el PNG se comprime al máximo (más lento, archivo menor).
+    """
+    import geopandas as gpd
+    import matplotlib.pyplot as plt
+    import matplotlib.patheffects as pe
+    from matplotlib.collections import PatchCollection
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.patches import PathPatch
+    from shapely.geometry import box
 
     # Extraer colores de la paleta
     c = paleta  # alias corto
 
-    # Unir geometrías para el contorno completo
-    peninsula_unida = unary_union(baja.geometry)
-
     # Calcular proporciones del mapa
     ancho = lon_max - lon_min
     alto = lat_max - lat_min
@@ -242,56 +477,96 @@ def generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta):
     fig_ancho = 10
     fig_alto = max(6, fig_ancho * ratio)
 
+    # Recortar al área visible: GEOS descarta una sola vez los vértices que
+    # quedan fuera del marco, en lugar de que matplotlib los procese al dibujar.
+    # La ventana se amplía un 2% para que los bordes creados por el corte
+    # queden fuera de los ejes y no se dibujen como contorno sobre el marco
+    margen = 0.02 * max(ancho, alto)
+    ventana = box(lon_min - margen, lat_min - margen, lon_max + margen, lat_max + margen)
+    baja_vista = gpd.clip(baja, ventana)
+    peninsula_vista = peninsula_unida.intersection(ventana)
+
+    # Simplificar a un píxel de la imagen exportada: los vértices más finos no
+    # se ven. Sin preservar topología (Douglas-Peucker puro, más rápido), ya
+    # que el resultado solo se dibuja
+    tolerancia = ancho / (fig_ancho * DPI_SALIDA)
+    baja_vista["geometry"] = baja_vista.geometry.simplify(
+        tolerancia, preserve_topology=False
+    )
+    peninsula_vista = peninsula_vista.simplify(tolerancia, preserve_topology=False)
+
     fig, ax = plt.subplots(
         1, 1,
         figsize=(fig_ancho, fig_alto),
-        facecolor=c.get("fondo_figura", "#ffffff")
+        facecolor=c.get("fondo_figura", "#ffffff"),
+        layout="constrained"
     )
     ax.set_facecolor(c.get("fondo_mapa", "#ffffff"))
 
-    # Dibujar el relleno con un color suave
-    baja.plot(
-        ax=ax,
-        color=c.get("relleno_tierra", "#f5e6ca"),
-        edgecolor="none",
-        alpha=0.8
-    )
-
-    # Dibujar el contorno de la península completa (unida)
-    gpd.GeoSeries([peninsula_unida]).plot(
-        ax=ax,
-        facecolor="none",
-        edgecolor=c.get("contorno", "#1a3c6e"),
-        linewidth=1.5,
-        alpha=0.9
-    )
-
-    # Dibujar la división entre los dos estados (línea interna)
-    baja.boundary.plot(
-        ax=ax,
-        edgecolor=c.get("division_estados", "#cc3333"),
-        linewidth=1.0,
-        linestyle="--",
+    # Cada estado es un PathPatch (con sus huecos, si los tuviera); los mismos
+    # trazos sirven para el relleno y para la división entre estados
+    trazos = [
+        _trayectoria_anillos(g)
+        for g in baja_vista.geometry.values if not g.is_empty
+    ]
+
+    # Relleno en una sola colección, rasterizado a DPI_SALIDA (en PDF/SVG
+    # queda como una imagen); contorno y divisiones siguen vectoriales
+    ax.add_collection(PatchCollection(
+        [PathPatch(t) for t in trazos],
+        facecolors=c.get("relleno_tierra", "#f5e6ca"),
+        edgecolors="none",
+        alpha=0.8,
+        rasterized=True
+    ))
+
+    # Dibujar el contorno de la península completa (unida, vectorial)
+    if not peninsula_vista.is_empty:
+        ax.add_patch(PathPatch(
+            _trayectoria_anillos(peninsula_vista),
+            facecolor="none",
+            edgecolor=c.get("contorno", "#1a3c6e"),
+            linewidth=1.5,
+            alpha=0.9
+        ))
+
+    # Dibujar la división entre los dos estados (solo bordes, vectorial)
+    ax.add_collection(PatchCollection(
+        [PathPatch(t) for t in trazos],
+        facecolors="none",
+        edgecolors=c.get("division_estados", "#cc3333"),
+        linewidths=1.0,
+        linestyles="--",
         alpha=0.6
-    )
+    ))
+
+    # Sin GeoDataFrame.plot hay que fijar a mano la relación de aspecto de
+    # coordenadas geográficas (la misma que usa geopandas)
+    ax.set_aspect(1 / math.cos(math.radians((lat_min + lat_max) / 2)))
 
     # ─── Etiquetas de los estados ─────────────────────────────────────────
-    for idx, row in baja.iterrows():
-        centroid = row.geometry.centroid
+    # Punto representativo en bloque (una sola llamada vectorizada a GEOS):
+    # siempre cae dentro del estado, a diferencia del centroide de una forma
+    # alargada como Baja California Sur, y no dispara la advertencia de
+    # geopandas por calcular centroides en coordenadas geográficas
+    puntos = baja_vista.geometry.representative_point()
+    # Estilo compartido por todas las etiquetas (se crea una sola vez)
+    fuente_etiqueta = FontProperties(size=11, weight="bold", family="sans-serif")
+    contorno_texto = [
+        pe.withStroke(linewidth=3, foreground=c.get("texto_stroke", "#ffffff"))
+    ]
+    color_etiqueta = c.get("texto_etiquetas", "#1a1a1a")
+    for nombre, x, y in zip(
+        baja_vista["name"].to_numpy(), puntos.x.to_numpy(), puntos.y.to_numpy()
+    ):
         ax.annotate(
-            row["name"],
-            xy=(centroid.x, centroid.y),
-            fontsize=11,
-            fontweight="bold",
-            color=c.get("texto_etiquetas", "#1a1a1a"),
+            nombre,
+            xy=(x, y),
+            fontproperties=fuente_etiqueta,
+            color=color_etiqueta,
             ha="center",
             va="center",
-            path_effects=[
-                pe.withStroke(
-                    linewidth=3,
-                    foreground=c.get("texto_stroke", "#ffffff")
-                )
-            ]
+            path_effects=contorno_texto
         )
 
     # ─── Configurar límites según lo que pidió el usuario ─────────────────
@@ -379,52 +654,108 @@ def generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta):
     )
 
     # ─── Guardar y mostrar ────────────────────────────────────────────────
-    plt.tight_layout()
-
-    output_file = "mapa_baja_california.png"
+    # layout="constrained" ajusta los márgenes dentro del mismo dibujo; sin
+    # bbox_inches="tight" savefig no hace una pasada extra para medir
+    # El PNG lo escribe Pillow con el nivel de compresión elegido; el DEFLATE
+    # por defecto (6) es la mayor parte del costo de guardar un mapa plano.
+    # Otros formatos (PDF, SVG) no aceptan pil_kwargs
+    opciones = {}
+    compresion = None
+    if os.path.splitext(output_file)[1].lower() == ".png":
+        compresion = COMPRESION_PNG_FINAL if final else COMPRESION_PNG_RAPIDA
+        opciones["pil_kwargs"] = {"compress_level": compresion, "optimize": False}
     plt.savefig(
         output_file,
-        dpi=200,
-        bbox_inches="tight",
+        dpi=DPI_SALIDA,
         facecolor=c.get("fondo_figura", "#ffffff"),
-        edgecolor="none"
+        edgecolor="none",
+        **opciones
     )
 
     nombre_paleta = c.get("nombre", "Sin nombre")
-    print("=" * 60)
-    print(f"  ✅ Mapa guardado como '{output_file}'")
-    print(f"     Resolución: 200 DPI")
-    print(f"     Paleta: {nombre_paleta}")
-    print(f"     Área: Lat [{lat_min}°, {lat_max}°]")
-    print(f"           Lon [{lon_min}°, {lon_max}°]")
-    print(f"     Fuente: Natural Earth (1:10m)")
-    print("=" * 60)
+    log.info("=" * 60)
+    log.info("  ✅ Mapa guardado como '%s'", output_file)
+    log.info("     Resolución: %d DPI", DPI_SALIDA)
+    if compresion is not None:
+        log.info("     Compresión PNG: nivel %d", compresion)
+    log.info("     Paleta: %s", nombre_paleta)
+    log.info("     Área: Lat [%s°, %s°]", lat_min, lat_max)
+    log.info("           Lon [%s°, %s°]", lon_min, lon_max)
+    log.info("     Fuente: Natural Earth (1:10m)")
+    log.info("=" * 60)
 
     plt.show()
-    print("\n¡Listo! El mapa se ha generado exitosamente.")
+    log.info("\n¡Listo! El mapa se ha generado exitosamente.")
+
+
+# ─── Argumentos de línea de comandos ─────────────────────────────────────────
+def leer_argumentos():
+    """Opciones para ejecutar sin preguntas (todas opcionales)."""
+    parser = argparse.ArgumentParser(
+        description="Genera el mapa de la Península de Baja California."
+    )
+    parser.add_argument(
+        "--paleta", type=int, metavar="N",
+        help="número de paleta (como en el menú); si se da, no se pregunta"
+    )
+    parser.add_argument(
+        "--bounds", nargs=4, type=float,
+        metavar=("LAT_MIN", "LAT_MAX", "LON_MIN", "LON_MAX"),
+        help="área del mapa; si se da, no se pregunta por las coordenadas"
+    )
+    parser.add_argument(
+        "--final", action="store_true",
+        help="exportación final: PNG con compresión máxima (más lento)"
+    )
+    parser.add_argument(
+        "--output", default=ARCHIVO_SALIDA, metavar="ARCHIVO",
+        help=f"imagen de salida (por defecto: {ARCHIVO_SALIDA})"
+    )
+    parser.add_argument(
+        "--quiet", action="store_true",
+        help="solo muestra errores (los menús interactivos se siguen mostrando)"
+    )
+    return parser.parse_args()
 
 
 # ─── PRINCIPAL ────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
-    print("")
-    print("╔════════════════════════════════════════════════════════════╗")
-    print("║   GENERADOR DE MAPA - PENÍNSULA DE BAJA CALIFORNIA       ║")
-    print("║   Fuente: Natural Earth (naturalearthdata.com)            ║")
-    print("╚════════════════════════════════════════════════════════════╝")
-    print("")
+    args = leer_argumentos()
+    logging.basicConfig(
+        level=logging.ERROR if args.quiet else logging.INFO,
+        format="%(message)s",
+        stream=sys.stdout
+    )
+
+    log.info("")
+    log.info("╔════════════════════════════════════════════════════════════╗")
+    log.info("║   GENERADOR DE MAPA - PENÍNSULA DE BAJA CALIFORNIA       ║")
+    log.info("║   Fuente: Natural Earth (naturalearthdata.com)            ║")
+    log.info("╚════════════════════════════════════════════════════════════╝")
+    log.info("")
 
     # Paso 1: Descargar datos si no existen
     archivo = descargar_datos()
 
     # Paso 2: Cargar paletas y dejar al usuario elegir
     paletas = cargar_paletas()
-    paleta = pedir_paleta(paletas)
+    if args.paleta is not None:
+        paleta = elegir_paleta(paletas, args.paleta)
+    else:
+        paleta = pedir_paleta(paletas)
 
-    # Paso 3: Pedir coordenadas al usuario
-    lat_min, lat_max, lon_min, lon_max = pedir_coordenadas()
+    # Paso 3: Área del mapa (--bounds o pregunta al usuario); va antes de
+    # cargar porque el área filtra los estados
+    if args.bounds:
+        lat_min, lat_max, lon_min, lon_max = normalizar_area(*args.bounds)
+    else:
+        lat_min, lat_max, lon_min, lon_max = pedir_coordenadas()
 
     # Paso 4: Cargar y filtrar datos
-    baja = cargar_datos(archivo)
+    baja, peninsula_unida = cargar_datos(archivo, lat_min, lat_max, lon_min, lon_max)
 
     # Paso 5: Generar el mapa
-    generar_mapa(baja, lat_min, lat_max, lon_min, lon_max, paleta)
+    generar_mapa(
+        baja, peninsula_unida, lat_min, lat_max, lon_min, lon_max, paleta,
+        final=args.final, output_file=args.output
+    )